@@ -7,6 +7,7 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from database.models import GNSSData, Base
 from database.session import get_db_session, engine
+from database.overrides import apply_height_overrides
 from worker.tasks import process_raw_data
 
 Base.metadata.create_all(bind=engine)
@@ -132,23 +133,60 @@ async def get_station_height(station_id: str):
 
 class HeightOverridePayload(BaseModel):
     station_id: str
-    timestamp: str
+    timestamp: datetime
     height: float
     user_id: str # For security/auditing
 
+class HeightCorrection(BaseModel):
+    station_id: str
+    start: datetime
+    end: datetime
+    offset: Optional[float] = None # Added to every height in the range
+    value: Optional[float] = None # Replaces every height in the range
+
+class BulkHeightOverridePayload(BaseModel):
+    user_id: str # For security/auditing
+    corrections: List[HeightCorrection]
+
+def _run_height_overrides(corrections, user_id):
+    try:
+        with get_db_session() as db_session:
+            return apply_height_overrides(db_session, corrections, user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/api/v1/height/override", dependencies=[Depends(verify_token)])
 async def override_height(payload: HeightOverridePayload):
     """
     Allows manual override of a height measurement.
-    This is a secure endpoint and should be protected.
+    The original value is archived and the hourly rollup is recomputed.
     """
-    # Placeholder for authentication/authorization logic
-    print(f"User {payload.user_id} is overriding height for station {payload.station_id} at {payload.timestamp} with value {payload.height}")
-
-    # Placeholder for database logic
-    # 1. Fetch the original record
-    # 2. Archive the original record (e.g., set an 'overridden' flag)
-    # 3. Insert the new, corrected record with a 'manual_override' flag
-    print("Database logic placeholder: Original value preserved, new value inserted.")
-
-    return {"status": "success", "message": f"Height for {payload.station_id} at {payload.timestamp} overridden by user {payload.user_id}."}
\ No newline at end of file
+    correction = {
+        "station_id": payload.station_id,
+        "start": payload.timestamp,
+        "end": payload.timestamp,
+        "value": payload.height,
+    }
+    affected = _run_height_overrides([correction], payload.user_id)
+    if not affected[0]:
+        raise HTTPException(status_code=404, detail="Measurement not found")
+
+    return {"status": "success", "message": f"Height for {payload.station_id} at {payload.timestamp} overridden by user {payload.user_id}."}
+
+@app.post("/api/v1/height/override/bulk", dependencies=[Depends(verify_token)])
+async def override_height_bulk(payload: BulkHeightOverridePayload):
+    """
+    Applies a set of range corrections (offset or fixed value) in a single
+    transaction; either all of them are stored or none are.
+    """
+    corrections = [correction.dict() for correction in payload.corrections]
+    affected = _run_height_overrides(corrections, payload.user_id)
+
+    return {
+        "status": "success",
+        "user_id": payload.user_id,
+        "corrections": [
+            {"station_id": c["station_id"], "start": c["start"], "end": c["end"], "rows_updated": n}
+            for c, n in zip(corrections, affected)
+        ],
+    }
@@ -4,4 +4,38 @@ CREATE TABLE gnss_data (
     rinex_file_path VARCHAR,
     processing_status VARCHAR DEFAULT 'pending',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+CREATE TABLE measurements (
+    id SERIAL PRIMARY KEY,
+    station_id VARCHAR NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
+    reflector_height DOUBLE PRECISION NOT NULL,
+    is_override BOOLEAN NOT NULL DEFAULT FALSE,
+    override_user_id VARCHAR,
+    overridden_at TIMESTAMP
+);
+
+CREATE INDEX ix_measurements_station_timestamp ON measurements (station_id, timestamp);
+
+CREATE TABLE measurement_archive (
+    id SERIAL PRIMARY KEY,
+    measurement_id INTEGER NOT NULL,
+    station_id VARCHAR NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
+    reflector_height DOUBLE PRECISION NOT NULL,
+    archived_by VARCHAR NOT NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX ix_measurement_archive_measurement_id ON measurement_archive (measurement_id);
+
+CREATE TABLE height_rollups (
+    station_id VARCHAR NOT NULL,
+    bucket_start TIMESTAMP NOT NULL,
+    sample_count INTEGER NOT NULL,
+    mean_height DOUBLE PRECISION NOT NULL,
+    min_height DOUBLE PRECISION NOT NULL,
+    max_height DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (station_id, bucket_start)
+);
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import datetime
@@ -19,6 +19,52 @@ class GNSSData(Base):
     def __repr__(self):
         return f"<GNSSData(id={self.id}, status='{self.processing_status}')>"
 
+class Measurement(Base):
+    __tablename__ = 'measurements'
+    __table_args__ = (
+        Index('ix_measurements_station_timestamp', 'station_id', 'timestamp'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    station_id = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    reflector_height = Column(Float, nullable=False)
+    is_override = Column(Boolean, nullable=False, default=False)
+    override_user_id = Column(String)
+    overridden_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<Measurement(station_id='{self.station_id}', timestamp={self.timestamp}, height={self.reflector_height})>"
+
+class MeasurementArchive(Base):
+    """Value of a measurement as it was before a manual override replaced it."""
+    __tablename__ = 'measurement_archive'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    measurement_id = Column(Integer, nullable=False, index=True)
+    station_id = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    reflector_height = Column(Float, nullable=False)
+    archived_by = Column(String, nullable=False)
+    archived_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f"<MeasurementArchive(measurement_id={self.measurement_id}, height={self.reflector_height})>"
+
+class HeightRollup(Base):
+    """Hourly aggregate of reflector height per station."""
+    __tablename__ = 'height_rollups'
+
+    station_id = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    sample_count = Column(Integer, nullable=False)
+    mean_height = Column(Float, nullable=False)
+    min_height = Column(Float, nullable=False)
+    max_height = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<HeightRollup(station_id='{self.station_id}', bucket_start={self.bucket_start}, mean={self.mean_height})>"
+
 # Example of how to create the database and table
 if __name__ == '__main__':
     engine = create_engine('sqlite:///gnss_data.db')
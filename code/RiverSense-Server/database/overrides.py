@@ -0,0 +1,227 @@
+import datetime
+import zlib
+from sqlalchemy import and_, delete, func, insert, literal, select, update
+from .models import Measurement, MeasurementArchive, HeightRollup
+
+ROLLUP_INTERVAL = datetime.timedelta(hours=1)
+
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+
+def _to_utc_naive(value):
+    """Stored timestamps are naive UTC; normalise aware datetimes to match."""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+def _bucket_floor(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+def _check_dialect(db_session):
+    """Fails before anything is written if rollups can't be built on this database."""
+    dialect_name = db_session.get_bind().dialect.name
+    if dialect_name not in SUPPORTED_DIALECTS:
+        raise ValueError(f"Height overrides are not supported on {dialect_name}")
+    return dialect_name
+
+def _bucket_expression(dialect_name):
+    """SQL expression truncating Measurement.timestamp to its rollup bucket."""
+    if dialect_name == "postgresql":
+        return func.date_trunc("hour", Measurement.timestamp)
+    # SQLAlchemy stores DateTime on SQLite as "YYYY-MM-DD HH:MM:SS.ffffff";
+    # slicing the hour prefix is much cheaper than strftime per row.
+    return func.substr(Measurement.timestamp, 1, 13).concat(":00:00.000000")
+
+def _lock_stations(db_session, station_ids):
+    """
+    Serialises writers per station until the transaction ends, so concurrent
+    overrides can't archive each other's values or collide on rollup rows.
+    SQLite already serialises all writers, so only Postgres needs a lock.
+    """
+    if db_session.get_bind().dialect.name != "postgresql":
+        return
+    # Sorted so two batches over the same stations can't deadlock.
+    for station_id in sorted(set(station_ids)):
+        db_session.execute(select(func.pg_advisory_xact_lock(zlib.crc32(station_id.encode()))))
+
+def _merge_ranges(ranges):
+    """Collapse overlapping (station_id, start, end) bucket ranges."""
+    merged = []
+    for station_id, start, end in sorted(ranges):
+        if merged and merged[-1][0] == station_id and start <= merged[-1][2] + ROLLUP_INTERVAL:
+            merged[-1][2] = max(merged[-1][2], end)
+        else:
+            merged.append([station_id, start, end])
+    return merged
+
+def refresh_height_rollups(db_session, station_id, start, end):
+    """
+    Recomputes the rollup buckets covering [start, end] for one station.
+    Only those buckets are rewritten; the rest of the history is untouched.
+    """
+    dialect_name = _check_dialect(db_session)
+    _lock_stations(db_session, [station_id])
+    first_bucket = _bucket_floor(_to_utc_naive(start))
+    last_bucket = _bucket_floor(_to_utc_naive(end))
+    bucket = _bucket_expression(dialect_name)
+
+    db_session.execute(
+        delete(HeightRollup).where(
+            HeightRollup.station_id == station_id,
+            HeightRollup.bucket_start.between(first_bucket, last_bucket),
+        )
+    )
+    aggregates = (
+        select(
+            Measurement.station_id,
+            bucket,
+            func.count(),
+            func.avg(Measurement.reflector_height),
+            func.min(Measurement.reflector_height),
+            func.max(Measurement.reflector_height),
+        )
+        .where(
+            Measurement.station_id == station_id,
+            Measurement.timestamp >= first_bucket,
+            Measurement.timestamp < last_bucket + ROLLUP_INTERVAL,
+        )
+        .group_by(Measurement.station_id, bucket)
+    )
+    db_session.execute(
+        insert(HeightRollup).from_select(
+            ["station_id", "bucket_start", "sample_count", "mean_height", "min_height", "max_height"],
+            aggregates,
+        )
+    )
+
+def rebuild_height_rollups(db_session, station_id):
+    """Recomputes every rollup bucket for a station from its measurements."""
+    first, last = db_session.execute(
+        select(func.min(Measurement.timestamp), func.max(Measurement.timestamp))
+        .where(Measurement.station_id == station_id)
+    ).one()
+    if first is None:
+        db_session.execute(delete(HeightRollup).where(HeightRollup.station_id == station_id))
+        return
+    refresh_height_rollups(db_session, station_id, first, last)
+
+def _rollups_current(db_session, station_id, first_bucket, last_bucket):
+    """
+    True if the stored buckets in the range account for every measurement in
+    it. Missing buckets, or measurements ingested or removed since the
+    rollups were built, make the counts disagree.
+    """
+    rolled_up = db_session.execute(
+        select(func.coalesce(func.sum(HeightRollup.sample_count), 0)).where(
+            HeightRollup.station_id == station_id,
+            HeightRollup.bucket_start.between(first_bucket, last_bucket),
+        )
+    ).scalar()
+    measured = db_session.execute(
+        select(func.count()).select_from(Measurement).where(
+            Measurement.station_id == station_id,
+            Measurement.timestamp >= first_bucket,
+            Measurement.timestamp < last_bucket + ROLLUP_INTERVAL,
+        )
+    ).scalar()
+    return rolled_up == measured
+
+def _shift_rollups(db_session, station_id, first_bucket, last_bucket, offset):
+    db_session.execute(
+        update(HeightRollup)
+        .where(
+            HeightRollup.station_id == station_id,
+            HeightRollup.bucket_start.between(first_bucket, last_bucket),
+        )
+        .values(
+            mean_height=HeightRollup.mean_height + offset,
+            min_height=HeightRollup.min_height + offset,
+            max_height=HeightRollup.max_height + offset,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def apply_height_overrides(db_session, corrections, user_id):
+    """
+    Applies a batch of height corrections inside the caller's transaction.
+
+    Each correction is a dict with station_id, start, end and exactly one of
+    offset (added to every height in the range) or value (replaces it).
+    The replaced values are copied to measurement_archive before the
+    measurements are rewritten, then only the affected rollup buckets are
+    recomputed. Returns the number of measurements changed per correction.
+    """
+    if not user_id:
+        raise ValueError("user_id is required for height overrides")
+    _check_dialect(db_session)
+    _lock_stations(db_session, [correction["station_id"] for correction in corrections])
+
+    now = datetime.datetime.utcnow()
+    affected = []
+    touched_ranges = []
+    for correction in corrections:
+        station_id = correction["station_id"]
+        start = _to_utc_naive(correction["start"])
+        end = _to_utc_naive(correction["end"])
+        offset = correction.get("offset")
+        value = correction.get("value")
+        if start > end:
+            raise ValueError(f"Correction for {station_id} starts after it ends")
+        if (offset is None) == (value is None):
+            raise ValueError(f"Correction for {station_id} needs exactly one of offset or value")
+
+        first_bucket = _bucket_floor(start)
+        last_bucket = _bucket_floor(end)
+        first_full = first_bucket if first_bucket == start else first_bucket + ROLLUP_INTERVAL
+        last_full = last_bucket - ROLLUP_INTERVAL
+        # Buckets wholly inside the range can simply shift by the offset, but
+        # only if they are already current; otherwise recompute the range.
+        shift = (
+            offset is not None
+            and first_full <= last_full
+            and _rollups_current(db_session, station_id, first_full, last_full)
+        )
+
+        in_range = and_(
+            Measurement.station_id == station_id,
+            Measurement.timestamp.between(start, end),
+        )
+        db_session.execute(
+            insert(MeasurementArchive).from_select(
+                ["measurement_id", "station_id", "timestamp", "reflector_height", "archived_by", "archived_at"],
+                select(
+                    Measurement.id,
+                    Measurement.station_id,
+                    Measurement.timestamp,
+                    Measurement.reflector_height,
+                    literal(user_id),
+                    literal(now),
+                ).where(in_range),
+            )
+        )
+        new_height = Measurement.reflector_height + offset if offset is not None else value
+        result = db_session.execute(
+            update(Measurement)
+            .where(in_range)
+            .values(
+                reflector_height=new_height,
+                is_override=True,
+                override_user_id=user_id,
+                overridden_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        affected.append(result.rowcount)
+
+        if shift:
+            # Only the partially covered buckets at either edge need a full recompute.
+            _shift_rollups(db_session, station_id, first_full, last_full, offset)
+            if first_full != first_bucket:
+                touched_ranges.append((station_id, first_bucket, first_bucket))
+            touched_ranges.append((station_id, last_bucket, last_bucket))
+        else:
+            touched_ranges.append((station_id, first_bucket, last_bucket))
+
+    for station_id, start, end in _merge_ranges(touched_ranges):
+        refresh_height_rollups(db_session, station_id, start, end)
+
+    return affected
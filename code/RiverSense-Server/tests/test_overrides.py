@@ -0,0 +1,119 @@
+import datetime
+import time
+import pytest
+from sqlalchemy import insert, select
+from database.models import Measurement, MeasurementArchive, HeightRollup
+from database.overrides import apply_height_overrides, rebuild_height_rollups
+
+START = datetime.datetime(2025, 1, 1)
+STEP = datetime.timedelta(minutes=5)
+
+def seed(db_session, station_id, points, height=10.0):
+    db_session.execute(insert(Measurement), [
+        {"station_id": station_id, "timestamp": START + i * STEP, "reflector_height": height + (i % 7) * 0.01}
+        for i in range(points)
+    ])
+
+def rollups(db_session):
+    return {
+        (r.station_id, r.bucket_start): (r.sample_count, round(r.mean_height, 9), round(r.min_height, 9), round(r.max_height, 9))
+        for r in db_session.scalars(select(HeightRollup))
+    }
+
+def assert_rollups_match_full_recompute(db_session, *station_ids):
+    incremental = rollups(db_session)
+    for station_id in station_ids:
+        rebuild_height_rollups(db_session, station_id)
+    assert incremental == rollups(db_session)
+
+def heights(db_session):
+    return db_session.execute(select(Measurement.id, Measurement.reflector_height).order_by(Measurement.id)).all()
+
+def test_edge_buckets_match_full_recompute(db_session):
+    seed(db_session, "A", 3 * 288)
+    seed(db_session, "B", 3 * 288)
+    rebuild_height_rollups(db_session, "A")
+    rebuild_height_rollups(db_session, "B")
+
+    apply_height_overrides(db_session, [
+        # Starts and ends mid-hour.
+        {"station_id": "A", "start": START + datetime.timedelta(hours=2, minutes=10),
+         "end": START + datetime.timedelta(hours=30, minutes=40), "offset": 0.5},
+        # Starts on a bucket boundary, timezone-aware.
+        {"station_id": "A", "start": datetime.datetime(2025, 1, 2, 15, tzinfo=datetime.timezone(datetime.timedelta(hours=7))),
+         "end": datetime.datetime(2025, 1, 2, 20, 5), "offset": -0.25},
+        # Value and offset in the same hour.
+        {"station_id": "A", "start": START + datetime.timedelta(hours=40, minutes=15),
+         "end": START + datetime.timedelta(hours=40, minutes=25), "value": 3.0},
+        {"station_id": "A", "start": START + datetime.timedelta(hours=40, minutes=20),
+         "end": START + datetime.timedelta(hours=40, minutes=50), "offset": 1.0},
+    ], "operator")
+
+    # The aware start is 08:00 UTC, point 384; the point before it is untouched.
+    shifted = db_session.scalars(select(Measurement.reflector_height).where(
+        Measurement.station_id == "A",
+        Measurement.timestamp.between(datetime.datetime(2025, 1, 2, 7, 55), datetime.datetime(2025, 1, 2, 8)),
+    ).order_by(Measurement.timestamp)).all()
+    assert shifted == pytest.approx([10.0 + (383 % 7) * 0.01, 10.0 + (384 % 7) * 0.01 - 0.25])
+    assert_rollups_match_full_recompute(db_session, "A", "B")
+
+def test_offset_fills_missing_and_stale_rollups(db_session):
+    seed(db_session, "A", 2 * 288)
+    apply_height_overrides(db_session, [
+        {"station_id": "A", "start": START, "end": START + datetime.timedelta(days=2), "offset": 0.5},
+    ], "operator")
+    assert len(rollups(db_session)) == 48
+
+    db_session.execute(insert(Measurement), [
+        {"station_id": "A", "timestamp": START + datetime.timedelta(hours=5, minutes=2), "reflector_height": 12.0},
+    ])
+    apply_height_overrides(db_session, [
+        {"station_id": "A", "start": START, "end": START + datetime.timedelta(days=2), "offset": 0.5},
+    ], "operator")
+    assert_rollups_match_full_recompute(db_session, "A")
+
+def test_invalid_correction_rolls_back_whole_batch(db_session):
+    seed(db_session, "A", 288)
+    rebuild_height_rollups(db_session, "A")
+    db_session.commit()
+    before_heights, before_rollups = heights(db_session), rollups(db_session)
+
+    with pytest.raises(ValueError):
+        apply_height_overrides(db_session, [
+            {"station_id": "A", "start": START, "end": START + datetime.timedelta(hours=6), "offset": 0.5},
+            {"station_id": "A", "start": START, "end": START + datetime.timedelta(hours=1), "offset": 0.5, "value": 2.0},
+        ], "operator")
+    db_session.rollback()
+
+    assert heights(db_session) == before_heights
+    assert rollups(db_session) == before_rollups
+    assert db_session.scalar(select(MeasurementArchive.id)) is None
+
+def test_archive_keeps_original_values_and_user(db_session):
+    seed(db_session, "A", 24)
+    affected = apply_height_overrides(db_session, [
+        {"station_id": "A", "start": START, "end": START + 2 * STEP, "value": 4.0},
+    ], "operator-7")
+
+    assert affected == [3]
+    archived = db_session.scalars(select(MeasurementArchive).order_by(MeasurementArchive.timestamp)).all()
+    assert [(a.archived_by, a.reflector_height) for a in archived] == [
+        ("operator-7", 10.0), ("operator-7", 10.01), ("operator-7", 10.02)]
+    overridden = db_session.scalars(select(Measurement).where(Measurement.is_override)).all()
+    assert {(m.reflector_height, m.override_user_id) for m in overridden} == {(4.0, "operator-7")}
+
+def test_year_long_offset_is_fast(db_session):
+    points = 365 * 288
+    seed(db_session, "A", points)
+    rebuild_height_rollups(db_session, "A")
+    db_session.commit()
+
+    started = time.perf_counter()
+    affected = apply_height_overrides(db_session, [
+        {"station_id": "A", "start": START, "end": START + (points - 1) * STEP, "offset": 0.35},
+    ], "operator")
+    db_session.commit()
+    elapsed = time.perf_counter() - started
+
+    assert affected == [points]
+    assert elapsed < 1.0
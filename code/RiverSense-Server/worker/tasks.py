@@ -3,6 +3,7 @@ import datetime
 from celery import Celery
 from database.models import GNSSData
 from database.session import get_db_session
+from database.overrides import rebuild_height_rollups
 
 app = Celery('tasks', broker='redis://redis:6379/0')
 
@@ -60,4 +61,13 @@ def convert_to_rinex(data_id):
         db_session.commit()
         print(f"Error in convert_to_rinex task: {e}")
     finally:
-        db_session.close()
\ No newline at end of file
+        db_session.close()
+
+@app.task
+def rebuild_station_rollups(station_id):
+    """
+    Celery task to backfill or rebuild the hourly height rollups for a station.
+    Run it after loading measurements by any path other than the override API.
+    """
+    with get_db_session() as db_session:
+        rebuild_height_rollups(db_session, station_id)